@@ -1,6 +1,21 @@
+from rest_framework.pagination import LimitOffsetPagination
+
+
 class KwargsContextMixin:
     def get_serializer_context(self):
         return {
             **super().get_serializer_context(),
             "kwagrs": self.kwargs
         }
+
+
+class BookPagination(LimitOffsetPagination):
+    default_limit = 50
+    max_limit = 500
+
+
+class OptionalBookPagination(BookPagination):
+    """
+    Paginate only if `limit` query param is passed
+    """
+    default_limit = None
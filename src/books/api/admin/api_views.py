@@ -1,12 +1,14 @@
+from django.db.models import Prefetch, Exists, OuterRef
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
-from books.tasks import update_book
+from books.tasks import schedule_update
 from books.validators import BookValidator
 from . import serializers
+from .. import OptionalBookPagination
 from ... import models
 
 PERMISSION_CLASSES = (IsAdminUser,)
@@ -27,9 +29,37 @@ class BookAdminViewSet(ModelViewSet):
     Get/create/update/delete book(s)
     """
     permission_classes = PERMISSION_CLASSES
-    pagination_class = None
+    pagination_class = OptionalBookPagination
     queryset = models.Book.objects.all()
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            # List serializer doesn't use structure
+            queryset = queryset.defer("structure")
+            invalid_langs = models.BookLanguage.objects.filter(book=OuterRef("pk")).exclude(validation_errors=[])
+            queryset = queryset.annotate(is_valid_ann=~Exists(invalid_langs.values("pk")))
+
+        # Other actions don't read related objects, or reset prefetched ones after save
+        if self.action not in ("list", "retrieve", "validate"):
+            return queryset
+
+        book_languages = Prefetch(
+            "book_languages",
+            queryset=models.BookLanguage.objects.select_related("lang").only(
+                "id", "hidden", "validation_errors", "last_modified", "book", "lang", "lang__code"
+            )
+        )
+        if self.action == "validate":
+            # BookValidator reads titles and annotations of all languages
+            return queryset.prefetch_related(models.Book.prefetch_titles(), book_languages)
+        # Serializers read only english title
+        return queryset.prefetch_related(
+            models.Book.prefetch_previews(),
+            models.Book.prefetch_titles("en", types=("title",)),
+            book_languages
+        )
+
     def get_serializer_class(self):
         return {
             "list": serializers.BookAdminListSerializer,
@@ -75,7 +105,7 @@ class BookLanguageViewSet(ModelViewSet):
         instance: models.BookLanguage = serializer.save()
         # If book is published
         if not instance.hidden and instance.hidden != instance.old_hidden:
-            update_book.delay(instance.book_id, instance.lang.code)
+            schedule_update(instance.book_id, instance.lang.code)
 
 
 class ImageAdminViewSet(ModelViewSet):
@@ -1,4 +1,3 @@
-import operator
 from typing import Optional, List
 
 from rest_framework import serializers
@@ -42,7 +41,7 @@ class BookAdminListSerializer(serializers.ModelSerializer):
         return book.get_title("en")
 
     def get_preview(self, book: models.Book) -> Optional[dict]:
-        preview = book.preview_images.first()
+        preview = book.first_preview
         if preview is None:
             return None
         return {
@@ -54,7 +53,11 @@ class BookAdminListSerializer(serializers.ModelSerializer):
         """
         True if ALL languages is valid
         """
-        return all(map(operator.not_, book.book_languages.values_list("validation_errors", flat=True)))
+        is_valid = getattr(book, "is_valid_ann", None)
+        if is_valid is None:
+            # Book was not fetched by BookAdminViewSet.get_queryset (e.g. just created)
+            is_valid = all(not book_lang.validation_errors for book_lang in book.book_languages.all())
+        return is_valid
 
     class Meta:
         model = models.Book
@@ -73,7 +76,7 @@ class BookAdminDetailSerializer(serializers.ModelSerializer):
             {
                 "id": img.id,
                 "file": img.file.url
-            } for img in book.preview_images.all()
+            } for img in book.previews
         ]
 
     class Meta:
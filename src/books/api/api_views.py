@@ -1,9 +1,11 @@
+from django.core.cache import cache
+from django.db.models import Prefetch
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
-from . import serializers, KwargsContextMixin
-from ..models import Language, Book
+from . import serializers, KwargsContextMixin, BookPagination
+from ..models import Language, Book, BookLanguage, unpack_content
 
 PERMISSION_CLASSES = ()
 
@@ -17,12 +19,26 @@ class LanguageViewSet(ReadOnlyModelViewSet):
 
 
 class BookViewSet(KwargsContextMixin, ReadOnlyModelViewSet):
-    pagination_class = None
+    pagination_class = BookPagination
     permission_classes = PERMISSION_CLASSES
 
     def get_queryset(self):
         lang = self.kwargs["lang"]
-        return Book.objects.filter(languages__code=lang, book_languages__hidden=False)
+        # Single filter() call to check lang and hidden flag on the same BookLanguage row
+        queryset = Book.objects.filter(book_languages__lang__code=lang, book_languages__hidden=False)
+        if self.action == "list":
+            # List serializer doesn't use structure
+            queryset = queryset.defer("structure")
+        return queryset.prefetch_related(
+            Book.prefetch_previews(),
+            Book.prefetch_titles(lang),
+            Prefetch(
+                "book_languages",
+                queryset=BookLanguage.objects.select_related("lang").only(
+                    "id", "book", "lang", "last_modified", "lang__code"
+                )
+            )
+        )
 
     def get_serializer_class(self):
         return {
@@ -32,5 +48,9 @@ class BookViewSet(KwargsContextMixin, ReadOnlyModelViewSet):
 
     @action(detail=True, methods=['GET'])
     def content(self, request, lang, **kwargs):
+        # Cached content belongs only to public translations, so cache hit doesn't need get_object()
+        item = unpack_content(cache.get(Book(id=kwargs["pk"]).get_cache_key(lang)))
+        if item:
+            return Response(item)
         book = self.get_object()
         return Response(book.get_or_render_content(lang)[0])
@@ -34,7 +34,7 @@ class BookListSerializer(BookBaseSerializer):
     preview = serializers.SerializerMethodField()
 
     def get_preview(self, book: Book) -> Optional[dict]:
-        preview = book.preview_images.first()
+        preview = book.first_preview
         if preview is None:
             return None
         return {
@@ -60,7 +60,7 @@ class BookDetailSerializer(BookBaseSerializer):
             {
                 "id": img.id,
                 "file": img.file.url
-            } for img in book.preview_images.all()
+            } for img in book.previews
         ]
 
     class Meta:
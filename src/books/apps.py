@@ -1,12 +1,13 @@
 import logging
-import os
+import sys
+from functools import lru_cache
 from typing import Callable
 
 import django.dispatch
-import psutil
 from django.apps import AppConfig
-from django.db import DatabaseError
-from django.db.models.signals import post_save, pre_delete
+from django.db import DatabaseError, transaction
+from django.db.models import Prefetch
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
@@ -24,26 +25,26 @@ class BooksConfig(AppConfig):
     name = 'books'
     verbose_name = _("Книги")
 
+    @lru_cache(maxsize=None)
     def get_run_type(self):
         """
         Get type of django instance
 
         :return: server | <manage command> | <celery command>
         """
-        p = psutil.Process(os.getpid())
-        cmdline = p.cmdline()
-        if cmdline[0].endswith("wsgi"):
+        argv = sys.argv
+        if argv[0].endswith("wsgi"):
             return "server"
-        if cmdline[1].endswith("manage.py"):
-            if cmdline[2] == "runserver":
+        if len(argv) > 1 and argv[0].endswith("manage.py"):
+            if argv[1] == "runserver":
                 return "server"
-            return cmdline[2].strip()
-        if cmdline[1].endswith("celery"):
-            return cmdline[2]
+            return argv[1].strip()
+        if len(argv) > 1 and argv[0].endswith("celery"):
+            return argv[1]
         return None
 
     def ready(self):
-        from books.tasks import update_book
+        from books.tasks import schedule_update, warm_up_books
         from books.validators import BookValidator
 
         Book = self.get_model('Book')
@@ -53,17 +54,30 @@ class BooksConfig(AppConfig):
 
         @receiver(book_changed, weak=False, dispatch_uid="on_book_changed")
         def on_book_changed(sender, book, lang, source, **kwargs):
-            logger.info(f"<Signal (book_changed) sender='{sender}' book='{book}' lang='{lang}'>")
+            logger.info("<Signal (book_changed) sender='%s' book='%s' lang='%s'>", sender, book, lang)
             if book is None:
                 return
             if lang:
                 lang_code = lang if isinstance(lang, str) else lang.code
-                book_lang = BookLanguage.objects.get(book=book, lang__code=lang_code)
+                book_lang = BookLanguage.objects.select_related("lang").only("hidden", "book", "lang__code") \
+                    .get(book_id=book.id, lang__code=lang_code)
                 if not book_lang.hidden:
-                    update_book.delay(book.id, lang_code)
+                    schedule_update(book.id, lang_code)
             else:
-                for code in book.languages.filter(booklanguage__hidden=False).values_list("code", flat=True):
-                    update_book.delay(book.id, code)
+                codes = BookLanguage.objects.filter(book_id=book.id, hidden=False).values_list("lang__code", flat=True)
+                for code in codes:
+                    schedule_update(book.id, code)
+
+        # Cached content is served without visibility check, so it is removed when translation stops being public.
+        # Book deletion is covered too: its BookLanguages are deleted by cascade and send post_delete
+        @receiver(post_save, sender=BookLanguage, weak=False, dispatch_uid="on_book_language_saved")
+        def on_book_language_saved(sender, instance, **kwargs):
+            if instance.hidden:
+                Book(id=instance.book_id).delete_cached_content(instance.lang.code)
+
+        @receiver(post_delete, sender=BookLanguage, weak=False, dispatch_uid="on_book_language_deleted")
+        def on_book_language_deleted(sender, instance, **kwargs):
+            Book(id=instance.book_id).delete_cached_content(instance.lang.code)
 
         run_type = self.get_run_type()
 
@@ -88,19 +102,38 @@ class BooksConfig(AppConfig):
 
             # Initialize cache
             try:
-                for book in Book.objects.all():
+                books = Book.objects.prefetch_related(
+                    Prefetch("book_languages", queryset=BookLanguage.objects.select_related("lang")),
+                    Book.prefetch_titles()
+                )
+                valid_ids = []
+                invalid_book_langs = []
+                book_langs = []
+                for book in books:
                     for book_lang in book.book_languages.all():
                         code = book_lang.lang.code
                         book_lang.validation_errors = [error.to_json() for error in BookValidator(book, code)]
-                        book_lang.save()
-                        msg = f'Book "{book.get_title(code)}" ({code}) validated.' \
-                              f' {len(book_lang.validation_errors)} errors found.'
+                        msg = 'Book "%s" (%s) validated. %s errors found.'
                         if book_lang.validation_errors:
-                            logger.warning(msg)
+                            invalid_book_langs.append(book_lang)
+                            logger.warning(msg, book.get_title(code), code, len(book_lang.validation_errors))
                         else:
-                            logger.info(msg)
-
-                        update_book.delay(book.id, code, keep_timestamp=True)
+                            valid_ids.append(book_lang.id)
+                            if logger.isEnabledFor(logging.INFO):
+                                logger.info(msg, book.get_title(code), code, 0)
+
+                        if not book_lang.hidden:
+                            book_langs.append((book.id, code))
+
+                # Django 2.0 has no bulk_update, so all valid translations are updated by single query
+                with transaction.atomic():
+                    BookLanguage.objects.filter(id__in=valid_ids).update(validation_errors=[])
+                    for book_lang in invalid_book_langs:
+                        BookLanguage.objects.filter(id=book_lang.id) \
+                            .update(validation_errors=book_lang.validation_errors)
+
+                if book_langs:
+                    warm_up_books.delay(book_langs)
             except DatabaseError:
                 pass
 
@@ -113,7 +146,7 @@ class BooksConfig(AppConfig):
 
         @receiver(signals, sender=model, weak=False, dispatch_uid=f"book_update:{model._meta.model_name}:on_change")
         def on_change(sender, instance, *args, **kwargs):
-            logger.info(f"<Signal {signals}> sender='{sender}' instance='{instance}'")
+            logger.info("<Signal %s> sender='%s' instance='%s'", signals, sender, instance)
             if not (condition is None or condition(instance)):
                 return
             book = book_getter(instance)
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('books', '0002_booklanguage_validation_errors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['book', 'type'], name='books_image_book_id_1d767f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='textfragment',
+            index=models.Index(fields=['book', 'type', 'lang'], name='books_textf_book_id_ae8652_idx'),
+        ),
+    ]
@@ -5,6 +5,8 @@ from typing import Iterable, Optional, List, Any, Dict, Tuple
 from uuid import uuid4
 
 import iso639
+import orjson
+import zstandard
 from django.contrib.postgres.fields import JSONField
 from django.core.cache import cache
 from django.db import models
@@ -18,6 +20,27 @@ SCHEMA_DIR = (Path(__file__) / ".." / "schemes").resolve()
 
 logger = logging.getLogger(__name__)
 
+# First byte of cached content, change it on cache format change
+CONTENT_CACHE_VERSION = b"\x01"
+
+
+def pack_content(content: List[dict]) -> bytes:
+    """
+    Serialize rendered book content to compressed cache payload
+    """
+    return CONTENT_CACHE_VERSION + zstandard.ZstdCompressor(level=3).compress(orjson.dumps(content))
+
+
+def unpack_content(raw) -> Optional[List[dict]]:
+    """
+    Deserialize payload created by pack_content()
+
+    :return: content or None if payload has unknown format
+    """
+    if not isinstance(raw, bytes) or raw[:1] != CONTENT_CACHE_VERSION:
+        return None
+    return orjson.loads(zstandard.ZstdDecompressor().decompress(raw[1:]))
+
 
 class Language(models.Model):
     LANG_CHOICES = sorted(
@@ -53,10 +76,17 @@ class BookLanguage(models.Model):
     hidden = models.BooleanField(default=True, blank=True, verbose_name=_("Скрыт"))
     validation_errors = JSONField(default=[], blank=True, verbose_name=_("Ошибки валидации"))
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.old_hidden = self.hidden
-        self.old_last_modified = self.last_modified
+    # Values loaded from db, None for new instances and deferred fields
+    old_hidden = None
+    old_last_modified = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read __dict__ directly to not trigger loading of deferred fields
+        instance.old_hidden = instance.__dict__.get("hidden")
+        instance.old_last_modified = instance.__dict__.get("last_modified")
+        return instance
 
     @property
     def is_valid(self):
@@ -82,20 +112,54 @@ class Book(models.Model):
 
     languages = models.ManyToManyField('Language', through='BookLanguage', verbose_name=_("Доступные языки"))
 
+    # Attributes filled by prefetch_previews() and prefetch_titles()
+    PREVIEWS_ATTR = "_preview_images"
+    TITLES_ATTR = "_titles_anns"
+
     @property
     def languages_list(self) -> Iterable[str]:
+        if "book_languages" in getattr(self, "_prefetched_objects_cache", {}):
+            # Read prefetched book_languages (with selected lang) instead of new query
+            return sorted(book_lang.lang.code for book_lang in self.book_languages.all())
         return list(self.languages.values_list("code", flat=True))
 
     @languages_list.setter
     def languages_list(self, value: Iterable[str]):
+        value = list(value)
+        langs = {lang.code: lang for lang in Language.objects.filter(code__in=value)}
+        missing = set(value) - langs.keys()
+        if missing:
+            raise Language.DoesNotExist(f"Languages not found: {', '.join(sorted(missing))}")
         BookLanguage.objects.filter(book=self).delete()
-        for lang in value:
-            BookLanguage.objects.create(lang=Language.objects.get(code=lang), book=self)
+        BookLanguage.objects.bulk_create([
+            BookLanguage(lang=langs[code], book=self)
+            for code in value
+        ])
 
     @property
     def preview_images(self):
         return self.images.filter(type="preview")
 
+    @property
+    def previews(self) -> Iterable['Image']:
+        """
+        Preview images, read from prefetch_previews() result if it is present
+        """
+        prefetched = getattr(self, self.PREVIEWS_ATTR, None)
+        if prefetched is None:
+            return self.preview_images.all()
+        return prefetched
+
+    @property
+    def first_preview(self) -> Optional['Image']:
+        """
+        First preview image, read from prefetch_previews() result if it is present
+        """
+        prefetched = getattr(self, self.PREVIEWS_ATTR, None)
+        if prefetched is None:
+            return self.preview_images.first()
+        return prefetched[0] if prefetched else None
+
     @property
     def content_images(self):
         return self.images.filter(type="body")
@@ -110,15 +174,39 @@ class Book(models.Model):
     def __str__(self):
         return self.get_title("en") or "?"
 
+    def get_text(self, type: str, lang: str) -> Optional[str]:
+        """
+        Return text of first TextFragment with given type and lang.
+        Use fragments loaded by prefetch_titles() if they are present
+
+        :param type: TextFragment type
+        :param lang: lang code
+        """
+        prefetched = getattr(self, self.TITLES_ATTR, None)
+        if prefetched is None:
+            return getattr(self.textfragment_set.filter(type=type, lang__code=lang).first(), 'text', None)
+        for fragment in prefetched:
+            if fragment.type == type and fragment.lang.code == lang:
+                return fragment.text
+        return None
+
     def get_title(self, lang: str) -> str:
-        return getattr(self.textfragment_set.filter(type="title", lang__code=lang).first(), 'text', None)
+        return self.get_text("title", lang)
 
     def get_annotation(self, lang: str) -> str:
-        return getattr(self.textfragment_set.filter(type="ann", lang__code=lang).first(), 'text', None)
+        return self.get_text("ann", lang)
 
     def get_cache_key(self, lang: str) -> str:
         return f"django:books:book:{self.id}:{lang}"
 
+    def delete_cached_content(self, *langs: str):
+        """
+        Remove rendered content of given langs from cache.
+        Called when translation is hidden or deleted (see BooksConfig.ready),
+        because cached content is served without db checks
+        """
+        cache.delete_many([self.get_cache_key(lang) for lang in langs])
+
     def get_or_render_content(self, lang: str, cache_read=True, cache_write=True) -> Tuple[Optional[List[dict]], bool]:
         """
         Return cached result of render_content()
@@ -126,29 +214,84 @@ class Book(models.Model):
         :return: (content_list, read_from_cache)
         """
         assert not (cache_read and not cache_write), "Cannot use cache without write access"
-        if not self.languages.filter(code=lang).exists():
-            return None, False
-
         key = self.get_cache_key(lang)
         if cache_read:
-            item = cache.get(key)
+            # Content is cached only for existing languages, so cache hit doesn't need any db check
+            item = unpack_content(cache.get(key))
             if item:
                 return item, True
 
+        hidden = self.book_languages.filter(lang__code=lang).values_list("hidden", flat=True).first()
+        if hidden is None:
+            return None, False
+
         content = self.render_content(lang)
-        if content and cache_write:
-            cache.set(key, content)
+        # Cached content is served without visibility check, so hidden translations are never cached
+        if content and cache_write and not hidden:
+            cache.set(key, pack_content(content))
         return content, False
 
+    @classmethod
+    def prefetch_previews(cls) -> models.Prefetch:
+        """
+        Prefetch of preview images, read by `previews` and `first_preview`
+        """
+        return models.Prefetch(
+            "images",
+            queryset=Image.objects.filter(type="preview").only("id", "file", "book").order_by("id"),
+            to_attr=cls.PREVIEWS_ATTR
+        )
+
+    @classmethod
+    def prefetch_titles(cls, lang: str = None, types: Iterable[str] = ("title", "ann")) -> models.Prefetch:
+        """
+        Prefetch of titles and annotations, read by get_title() and get_annotation()
+
+        :param lang: lang code, if passed only this lang is prefetched and other langs are read as missing
+        :param types: TextFragment types to prefetch, other types are read as missing
+        """
+        queryset = TextFragment.objects.filter(type__in=types).select_related("lang")
+        if lang is not None:
+            queryset = queryset.filter(lang__code=lang)
+        return models.Prefetch("textfragment_set", queryset=queryset, to_attr=cls.TITLES_ATTR)
+
+    @classmethod
+    def fetch_for_render(cls, lang: str) -> models.QuerySet:
+        """
+        Return queryset of books with prefetched content of given lang.
+        render_content() of these books doesn't make any additional queries
+
+        :param lang: lang code, books from this queryset can be rendered only with this lang
+        """
+        return cls.objects.prefetch_related(
+            models.Prefetch(
+                "textfragment_set",
+                queryset=TextFragment.objects.filter(type="body", lang__code=lang),
+                to_attr="_body_frags"
+            ),
+            models.Prefetch(
+                "images",
+                queryset=Image.objects.filter(type="body").select_related("author"),
+                to_attr="_body_images"
+            )
+        )
+
     def render_content(self, lang, cleanup=False) -> Optional[List[dict]]:
         structure: List[Dict[str, Any]] = self.structure
+        body_frags = getattr(self, "_body_frags", None)
+        if body_frags is None:
+            body_frags = self.textfragment_set.filter(type="body", lang__code=lang)
+        body_images = getattr(self, "_body_images", None)
+        if body_images is None:
+            body_images = self.content_images.select_related("author")
+
         text_fragments: Dict[str, TextFragment] = {
-            str(tf.uuid).replace("-", ""): tf
-            for tf in self.textfragment_set.filter(type="body", lang__code=lang)
+            tf.uuid.hex: tf
+            for tf in body_frags
         }
         images: Dict[int, Image] = {
             img.id: img
-            for img in self.content_images.all()
+            for img in body_images
         }
 
         content = []
@@ -156,7 +299,7 @@ class Book(models.Model):
             if item["type"] == "textfragment":
                 fragment = text_fragments.pop(item["id"], None)
                 if fragment is None:
-                    logger.warning(f"Fragment {item['id']}:{lang} not found for book {self.id}")
+                    logger.warning("Fragment %s:%s not found for book %s", item['id'], lang, self.id)
                     continue
                 content.append({
                     "type": "textfragment",
@@ -166,12 +309,12 @@ class Book(models.Model):
             elif item["type"] == "image":
                 image = images.pop(item["id"], None)
                 if image is None:
-                    logger.warning(f"Image {item['id']} not found for book {self.id}")
+                    logger.warning("Image %s not found for book %s", item['id'], self.id)
                     continue
 
                 title = text_fragments.pop(item["title"], None)
                 if title is None:
-                    logger.warning(f"Title of image {item['id']} not found for book {self.id}")
+                    logger.warning("Title of image %s not found for book %s", item['id'], self.id)
                     continue
 
                 author = image.author
@@ -192,7 +335,7 @@ class Book(models.Model):
                     if subitem["type"] == "textfragment":
                         fragment = text_fragments.pop(subitem["id"], None)
                         if fragment is None:
-                            logger.warning(f"Fragment {item['id']}:{lang} not found for book {self.id}")
+                            logger.warning("Fragment %s:%s not found for book %s", item['id'], lang, self.id)
                             continue
                         data["content"].append({
                             "type": "textfragment",
@@ -202,7 +345,7 @@ class Book(models.Model):
                     elif item["type"] == "image":
                         image = images.pop(subitem["id"], None)
                         if image is None:
-                            logger.warning(f"Image {item['id']} not found for book {self.id}")
+                            logger.warning("Image %s not found for book %s", item['id'], self.id)
                             continue
                         data["content"].append({
                             "type": "image",
@@ -216,8 +359,10 @@ class Book(models.Model):
                 for item in chain(text_fragments.values(), images.values()):
                     item.delete()
             else:
-                logger.warning(f'Book #{self.id} "{self.get_title(lang)}" (lang {lang}) has unused content items.'
-                               ' Run .render_content(..., cleanup=True) to delete them.')
+                if logger.isEnabledFor(logging.WARNING):
+                    logger.warning('Book #%s "%s" (lang %s) has unused content items.'
+                                   ' Run .render_content(..., cleanup=True) to delete them.',
+                                   self.id, self.get_title(lang), lang)
         return content
 
 
@@ -230,7 +375,16 @@ class Author(models.Model):
 
     @property
     def country_list(self) -> Iterable[str]:
-        return sorted(filter(None, map(str.strip, self.country.split(","))))
+        # Parsed list is memoized together with the raw value it was built from,
+        # so direct assignments to `country` (forms, serializers) invalidate it
+        cached = self.__dict__.get("_country_list")
+        if cached is None or cached[0] != self.country:
+            cached = self.__dict__["_country_list"] = (
+                self.country,
+                tuple(sorted(filter(None, map(str.strip, self.country.split(",")))))
+            )
+        # Copy, so callers can't mutate memoized value
+        return list(cached[1])
 
     @country_list.setter
     def country_list(self, value: Iterable[str]):
@@ -262,6 +416,9 @@ class Image(models.Model):
     class Meta:
         verbose_name = _("Изображение")
         verbose_name_plural = _("Изображения")
+        indexes = [
+            models.Index(fields=["book", "type"]),
+        ]
 
     def __str__(self):
         a = f'{self.book.get_title("eng")}: ' if self.book else ""
@@ -289,6 +446,9 @@ class TextFragment(models.Model):
         verbose_name_plural = _("Фрагменты текста")
         ordering = ("book", "lang", "uuid")
         unique_together = (("lang", "uuid"),)
+        indexes = [
+            models.Index(fields=["book", "type", "lang"]),
+        ]
 
     def __str__(self):
         return f"{self.book.get_title(self.lang.code)}: {self.get_type_display()} <{self.lang}> #{str(self.uuid)[:8]}..."
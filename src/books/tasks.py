@@ -1,24 +1,78 @@
 import logging
+from collections import defaultdict
+from typing import Iterable, Tuple
 
 from celery.utils.log import get_task_logger
+from django.core.cache import cache
 from django.utils import timezone
 
-from books.models import Book
+from books.models import Book, BookLanguage, pack_content
 from zg_book_project.celery import app
 
 logger = get_task_logger('celery.tasks')  # type: logging.Logger
 
 
-@app.task(bind=True, max_retries=1)
-def update_book(self, book_id, lang_code, keep_timestamp=False):
-    # TODO: Add redis lock
-    book = Book.objects.get(id=book_id)
-    content, from_cache = book.get_or_render_content(lang_code, cache_read=False)
-    if keep_timestamp:
-        logger.info(f'Book "{book.get_title(lang_code)}" ({lang_code}) loaded')
-    else:
+UPDATE_DEBOUNCE_TIMEOUT = 5  # seconds
+
+
+def get_debounce_key(book_id, lang_code) -> str:
+    return f"django:books:debounce:update_book:{book_id}:{lang_code}"
+
+
+def schedule_update(book_id, lang_code):
+    """
+    Run update_book after UPDATE_DEBOUNCE_TIMEOUT seconds,
+    all calls for the same (book_id, lang_code) before the task start are collapsed into this task
+    """
+    if cache.add(get_debounce_key(book_id, lang_code), 1, timeout=UPDATE_DEBOUNCE_TIMEOUT):
+        update_book.apply_async((book_id, lang_code), countdown=UPDATE_DEBOUNCE_TIMEOUT)
+
+
+@app.task(bind=True, max_retries=1, acks_late=True)
+def update_book(self, book_id, lang_code):
+    # Changes made after this point must schedule new update
+    cache.delete(get_debounce_key(book_id, lang_code))
+    try:
+        book = Book.fetch_for_render(lang_code).get(id=book_id)
         book_lang = book.book_languages.get(lang__code=lang_code)
-        book_lang.last_modified = timezone.now()
-        book_lang.save()
-        logger.info(f'Book "{book.get_title(lang_code)}" ({lang_code}) updated')
+    except (Book.DoesNotExist, BookLanguage.DoesNotExist):
+        # Book or translation was deleted during debounce countdown, its deletion scheduled this update
+        logger.debug('Book #%s (%s) not found, update skipped', book_id, lang_code)
+        return None
+    content, from_cache = book.get_or_render_content(lang_code, cache_read=False)
+    book_lang.last_modified = timezone.now()
+    book_lang.save()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info('Book "%s" (%s) updated', book.get_title(lang_code), lang_code)
     return content
+
+
+CACHE_WARMUP_BATCH = 100
+
+
+@app.task(bind=True, max_retries=1)
+def warm_up_books(self, book_langs: Iterable[Tuple[int, str]]):
+    """
+    Render content of given (book_id, lang_code) pairs and write it to cache by batches
+    """
+    ids_by_lang = defaultdict(list)
+    for book_id, lang_code in book_langs:
+        ids_by_lang[lang_code].append(book_id)
+
+    batch = {}
+    for lang_code, ids in ids_by_lang.items():
+        # Translation could be hidden after the task was sent
+        books = Book.fetch_for_render(lang_code).filter(
+            id__in=ids, book_languages__lang__code=lang_code, book_languages__hidden=False
+        )
+        for book in books:
+            content = book.render_content(lang_code)
+            if content:
+                batch[book.get_cache_key(lang_code)] = pack_content(content)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info('Book "%s" (%s) loaded', book.get_title(lang_code), lang_code)
+            if len(batch) >= CACHE_WARMUP_BATCH:
+                cache.set_many(batch)
+                batch = {}
+    if batch:
+        cache.set_many(batch)
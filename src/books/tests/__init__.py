@@ -1,11 +1,9 @@
-import operator
-from functools import reduce
+import string
 from pathlib import Path
-from random import choice, randint, sample
-from typing import Iterable, Tuple, Union, List
+from random import choice, choices, randint, sample
+from typing import Iterable, Tuple, Union, List, Dict
 from uuid import UUID
 
-import requests
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
@@ -13,20 +11,47 @@ from .. import models
 
 TESTS_PATH = (Path(__file__) / "..").resolve()
 
-# Get words list from online dict
-word_site = "http://svnweb.freebsd.org/csrg/share/dict/words?view=co&content-type=text/plain"
-response = requests.get(word_site)
-WORDS = [w.lower() for w in response.content.decode().splitlines() if len(w) > 2]
+# (code, name) of all languages except english
+_NON_EN_LANGS = tuple(
+    (code, name.split(" - ", 1)[1])
+    for code, name in models.Language.LANG_CHOICES
+    if code != "en"
+)
+
+# Words list, loaded from TESTS_PATH / "words.txt" on first use
+_WORDS: List[str] = None
+
+
+def get_words() -> List[str]:
+    global _WORDS
+    if _WORDS is None:
+        _WORDS = (TESTS_PATH / "words.txt").read_text().splitlines()
+    return _WORDS
+
+
+_ALPHA = string.ascii_lowercase
 
 
 def _random_word():
     "Deprecated"
-    chars = [chr(i) for i in range(ord('a'), ord('z') + 1)]
-    return "".join(choice(chars) for _ in range(randint(3, randint(3, 20))))
+    return "".join(choices(_ALPHA, k=randint(3, randint(3, 20))))
 
 
 def random_word():
-    return choice(WORDS)
+    return choice(get_words())
+
+
+# Default separators rates of random_sentences()
+_SEP_RATES = {
+    " ": 100,
+    ". ": 20,
+    ", ": 15,
+    "? ": 15,
+    "! ": 4,
+    ".\n": 2
+}
+_SEP_KEYS = list(_SEP_RATES)
+_SEP_WEIGHTS = list(_SEP_RATES.values())
 
 
 def random_sentences(words=100, rates=None):
@@ -37,31 +62,53 @@ def random_sentences(words=100, rates=None):
     :param rates: separators rates, higher rate => higher chance of picking that separator
     :return:
     """
-    rates = rates or {
-        " ": 100,
-        ". ": 20,
-        ", ": 15,
-        "? ": 15,
-        "! ": 4,
-        ".\n": 2
-    }
-    chars = reduce(operator.add, map(lambda x: [x[0]] * x[1], rates.items()))
-    return ("".join(
-        random_word() + choice(chars)
-        for _ in range(randint(words - words // 10, words + words // 10))
-    )).strip()
+    if rates:
+        keys, weights = list(rates), list(rates.values())
+    else:
+        keys, weights = _SEP_KEYS, _SEP_WEIGHTS
+    count = randint(words - words // 10, words + words // 10)
+    return "".join(
+        word + sep
+        for word, sep in zip(choices(get_words(), k=count), choices(keys, weights, k=count))
+    ).strip()
 
 
 def random_text():
     return " ".join([random_sentences() for _ in range(randint(2, 10))])
 
 
+TEXT_POOL_SIZE = 32
+# Pregenerated random_text() results, generated on first use
+_TEXT_POOL: List[str] = None
+
+
+def pooled_text():
+    """
+    Random text picked from the pool of pregenerated texts
+    """
+    global _TEXT_POOL
+    if _TEXT_POOL is None:
+        _TEXT_POOL = [random_text() for _ in range(TEXT_POOL_SIZE)]
+    return choice(_TEXT_POOL)
+
+
+# Content of test files, each file is read once
+_FILE_CACHE: Dict[Path, bytes] = {}
+
+
+def read_test_file(path: Path) -> bytes:
+    data = _FILE_CACHE.get(path)
+    if data is None:
+        data = _FILE_CACHE[path] = path.read_bytes()
+    return data
+
+
 def test_image(path: Path = TESTS_PATH / "ad.png"):
-    return SimpleUploadedFile(name=path.name, content=path.open("rb").read(), content_type='image/png')
+    return SimpleUploadedFile(name=path.name, content=read_test_file(path), content_type='image/png')
 
 
 def test_svg(path: Path = TESTS_PATH / "ad.svg"):
-    return SimpleUploadedFile(name=path.name, content=path.open("rb").read(), content_type='image/svg')
+    return SimpleUploadedFile(name=path.name, content=read_test_file(path), content_type='image/svg')
 
 
 class BookTest(TestCase):
@@ -70,28 +117,30 @@ class BookTest(TestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author, created = models.Author.objects.get_or_create(name="Author", age=18)
-        cls.author.country_list = ["ru", "gb"]
-        cls.author.save()
+        cls.author = models.Author.objects.create(name="Author", age=18, country_list=["ru", "gb"])
 
         if not models.Language.objects.exists():
             # Pick random langs + english as default
-            langs = set((l[0], l[1].split(" - ")[1]) for l in models.Language.LANG_CHOICES if l[0] != "en")
-            for code, name in sample(langs, cls.LANG_COUNT) + [("en", "English")]:
+            for code, name in sample(_NON_EN_LANGS, cls.LANG_COUNT) + [("en", "English")]:
                 models.Language.objects.create(code=code, name=name, flag=test_svg())
 
+        # Languages are fetched once and sampled for each book
+        other_langs = list(models.Language.objects.exclude(code="en"))
+        en_lang = models.Language.objects.get(code="en")
+
         for i in range(randint(2, 5)):
             book = models.Book.objects.create(author=cls.author)
 
-            for j in range(randint(4, 6)):
-                models.Image.objects.create(book=book, file=test_image(), type="preview", position=j)
+            models.Image.objects.bulk_create([
+                models.Image(book=book, file=test_image(), type="preview", position=j)
+                for j in range(randint(4, 6))
+            ])
 
-            langs: List[models.Language] = sample(
-                list(models.Language.objects.exclude(code="en")),
-                k=randint(2, cls.LANG_COUNT)
-            ) + [models.Language.objects.get(code="en")]
-            for lang in langs:
-                models.BookLanguage.objects.create(lang=lang, book=book, hidden=False)
+            langs: List[models.Language] = sample(other_langs, k=randint(2, cls.LANG_COUNT)) + [en_lang]
+            models.BookLanguage.objects.bulk_create([
+                models.BookLanguage(lang=lang, book=book, hidden=False)
+                for lang in langs
+            ])
 
             lang = langs.pop(0)
             title, annotation, textfrags, images = cls.createTranslation(book, lang)
@@ -99,65 +148,74 @@ class BookTest(TestCase):
             book.save()
 
             for lang in langs:
-                cls.createTranslation(book, lang, first=False)
+                cls.createTranslation(book, lang, first=False,
+                                      title_uuid=title.uuid, annotation_uuid=annotation.uuid)
 
     @classmethod
-    def createTranslation(cls, book: models.Book, lang: models.Language, first=True):
+    def createTranslation(cls, book: models.Book, lang: models.Language, first=True,
+                          title_uuid: UUID = None, annotation_uuid: UUID = None):
         """
         Create book translation and return it's data (only if first==True)
 
         :param book: Book
         :param lang: Language
         :param first: create structure if True else only create TextFragments
+        :param title_uuid: UUID of title of first translation (required if first==False)
+        :param annotation_uuid: UUID of annotation of first translation (required if first==False)
         :return: title, annotation, textfrags, images or None
         """
-        title = models.TextFragment.objects.create(
+        title = models.TextFragment(
             text=random_word() + " " + random_word(),
             type="title", book=book, lang=lang,
-            **{} if first else {
-                "uuid": models.TextFragment.objects.filter(book=book, type="title").first().uuid
-            }
+            **{} if first else {"uuid": title_uuid}
         )
-        annotation = models.TextFragment.objects.create(
-            text=random_text(),
+        annotation = models.TextFragment(
+            text=pooled_text(),
             type="ann", book=book, lang=lang,
-            **{} if first else {
-                "uuid": models.TextFragment.objects.filter(book=book, type="ann").first().uuid
-            }
+            **{} if first else {"uuid": annotation_uuid}
         )
+        # Objects are collected and inserted by bulk_create, UUIDs are generated on instantiation
+        frags = [title, annotation]
         if first:
             textfrags = [
-                models.TextFragment.objects.create(text=random_text(), type="body", book=book, lang=lang)
+                models.TextFragment(text=pooled_text(), type="body", book=book, lang=lang)
                 for _ in range(randint(1, 20))
             ]
+            frags.extend(textfrags)
+            image_objs = []
             images = []
             for _ in range(len(textfrags)):
-                image = models.Image.objects.create(file=test_image(), book=book, author=cls.author, type="body")
-                image_title = models.TextFragment.objects.create(text=random_word(), type="body", book=book, lang=lang)
+                image = models.Image(file=test_image(), book=book, author=cls.author, type="body")
+                image_title = models.TextFragment(text=random_word(), type="body", book=book, lang=lang)
+                image_objs.append(image)
+                frags.append(image_title)
                 body = []
                 for i in range(randint(2, 10)):
                     if i % 2:
-                        body.append(models.Image.objects.create(file=test_image(), book=book, type="body"))
+                        item = models.Image(file=test_image(), book=book, type="body")
+                        image_objs.append(item)
                     else:
-                        body.append(models.TextFragment.objects.create(text=random_text(), type="body", book=book,
-                                                                       lang=lang))
+                        item = models.TextFragment(text=pooled_text(), type="body", book=book, lang=lang)
+                        frags.append(item)
+                    body.append(item)
                 images.append((image, image_title, body))
+            # Image ids are required by genStructure(), they are set by bulk_create on PostgreSQL
+            models.Image.objects.bulk_create(image_objs, batch_size=200)
+            models.TextFragment.objects.bulk_create(frags, batch_size=500)
             return title, annotation, textfrags, images
         else:
             for item in book.structure:
                 if item["type"] == "textfragment":
-                    uuid = UUID(item["id"])
-                    models.TextFragment.objects.create(text=random_text(),
-                                                       uuid=uuid, type="body", book=book, lang=lang)
+                    frags.append(models.TextFragment(text=pooled_text(), uuid=UUID(item["id"]),
+                                                     type="body", book=book, lang=lang))
                 elif item["type"] == "image":
-                    uuid = UUID(item["title"])
-                    models.TextFragment.objects.create(text=random_word(),
-                                                       uuid=uuid, type="body", book=book, lang=lang)
+                    frags.append(models.TextFragment(text=random_word(), uuid=UUID(item["title"]),
+                                                     type="body", book=book, lang=lang))
                     for subitem in item["content"]:
                         if subitem["type"] == "textfragment":
-                            uuid = UUID(subitem["id"])
-                            models.TextFragment.objects.create(text=random_text(),
-                                                               uuid=uuid, type="body", book=book, lang=lang)
+                            frags.append(models.TextFragment(text=pooled_text(), uuid=UUID(subitem["id"]),
+                                                             type="body", book=book, lang=lang))
+            models.TextFragment.objects.bulk_create(frags, batch_size=500)
 
     @classmethod
     def genStructure(
@@ -176,15 +234,15 @@ class BookTest(TestCase):
         """
         struct = []
         for textfrag, (image, image_title, image_body) in zip(textfrags, images):
-            struct.append({"type": "textfragment", "id": str(textfrag.uuid).replace("-", "")})
+            struct.append({"type": "textfragment", "id": textfrag.uuid.hex})
             struct.append({
                 "type": "image",
                 "id": image.id,
-                "title": str(image_title.uuid).replace("-", ""),
+                "title": image_title.uuid.hex,
                 "content": [
                     {
                         "type": "textfragment",
-                        "id": str(item.uuid).replace("-", "")
+                        "id": item.uuid.hex
                     } if isinstance(item, models.TextFragment) else {
                         "type": "image",
                         "id": item.id,
@@ -199,10 +257,14 @@ class BookTest(TestCase):
         """
         Clear saved media-garbage
         """
-        image: models.Image
-        for image in models.Image.objects.all():
-            image.file.delete()
-        lang: models.Language
-        for lang in models.Language.objects.all():
-            lang.flag.delete()
+        # Rows are removed by TestCase rollback, so only files are deleted (without model saves)
+        for storage, names in (
+                (models.Image._meta.get_field("file").storage,
+                 models.Image.objects.values_list("file", flat=True)),
+                (models.Language._meta.get_field("flag").storage,
+                 models.Language.objects.values_list("flag", flat=True)),
+        ):
+            for name in names:
+                if name:
+                    storage.delete(name)
         super().tearDownClass()
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from . import BookTest, test_image, test_svg
+from .. import models
+from ..utils import validate_svg
+from ..validators import BookValidator
+
+
+class PackContentTest(SimpleTestCase):
+    def test_round_trip(self):
+        content = [
+            {"type": "textfragment", "text": "Текст"},
+            {"type": "image", "id": 1, "url": "/media/img/ad.png", "title": "title",
+             "author": {"name": "Author", "country": ["gb", "ru"], "link": ""}, "content": []},
+        ]
+        self.assertEqual(models.unpack_content(models.pack_content(content)), content)
+
+    def test_unknown_format(self):
+        self.assertIsNone(models.unpack_content(None))
+        self.assertIsNone(models.unpack_content([{"type": "textfragment", "text": "old cache format"}]))
+        self.assertIsNone(models.unpack_content(b"\x00" + models.pack_content([])[1:]))
+
+
+class ValidateSvgTest(SimpleTestCase):
+    def test_svg(self):
+        file = test_svg()
+        validate_svg(file)
+        # File must stay readable for storage
+        self.assertEqual(file.tell(), 0)
+
+    def test_png(self):
+        with self.assertRaises(ValidationError):
+            validate_svg(test_image())
+
+
+class BookApiTest(BookTest):
+    def setUp(self):
+        cache.clear()
+        self.book = models.Book.objects.first()
+
+    def get_content(self, book_id, lang="en"):
+        return self.client.get(f"/api/v1/books/{lang}/{book_id}/content/")
+
+    def test_fixtures(self):
+        for book_lang in models.BookLanguage.objects.select_related("book", "lang"):
+            code = book_lang.lang.code
+            self.assertEqual(list(BookValidator(book_lang.book, code)), [])
+            self.assertTrue(book_lang.book.render_content(code))
+
+    def test_list_pagination(self):
+        response = self.client.get("/api/v1/books/en/", {"limit": 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data), {"count", "next", "previous", "results"})
+        self.assertEqual(data["count"], models.Book.objects.count())
+        self.assertEqual(len(data["results"]), 1)
+
+    def test_content_cache_hit(self):
+        content, from_cache = self.book.get_or_render_content("en")
+        self.assertFalse(from_cache)
+        with self.assertNumQueries(0):
+            response = self.get_content(self.book.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), content)
+
+    def test_content_hidden(self):
+        self.book.get_or_render_content("en")
+        book_lang = models.BookLanguage.objects.get(book=self.book, lang__code="en")
+        book_lang.hidden = True
+        book_lang.save()
+
+        self.assertIsNone(cache.get(self.book.get_cache_key("en")))
+        self.assertEqual(self.get_content(self.book.id).status_code, 404)
+        # Hidden translation is rendered, but not cached
+        content, _ = self.book.get_or_render_content("en")
+        self.assertTrue(content)
+        self.assertIsNone(cache.get(self.book.get_cache_key("en")))
@@ -1,15 +1,32 @@
-from xml.etree import cElementTree as et
+from xml.etree import ElementTree as et
 
 from django.core.exceptions import ValidationError
 
+# Root tag of svg is searched in first SVG_HEAD_MAX_SIZE bytes of file, read by SVG_CHUNK_SIZE chunks
+SVG_CHUNK_SIZE = 4096
+SVG_HEAD_MAX_SIZE = 64 * 1024
+
 
 def validate_svg(file):
     tag = None
+    pos = file.tell()
+    # Only root tag is needed, so parse file until the first element
+    parser = et.XMLPullParser(('start',))
     try:
-        for event, el in et.iterparse(file, ('start',)):
-            tag = el.tag
-            break
+        read = 0
+        while tag is None and read < SVG_HEAD_MAX_SIZE:
+            chunk = file.read(SVG_CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            parser.feed(chunk)
+            for event, el in parser.read_events():
+                tag = el.tag
+                break
     except et.ParseError:
         pass
+    finally:
+        # Restore position, so file can be saved to storage after validation
+        file.seek(pos)
     if tag != '{http://www.w3.org/2000/svg}svg':
         raise ValidationError("File is not svg")
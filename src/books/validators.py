@@ -1,13 +1,24 @@
 import json
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, Dict, Iterable
+from typing import Union, Dict, Iterable, Iterator, Callable, Tuple, Optional, List
 
 import collections.abc
-from django.apps import apps
-from django.db import models
+import fastjsonschema
+from django.core.exceptions import ValidationError
+from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
-from jsonschema import validate
+
+
+@lru_cache(maxsize=None)
+def compile_schema(schema_json: str) -> Callable:
+    """
+    Compile JSON Schema to python function, compiled functions are shared between equal schemas
+
+    :param schema_json: JSON Schema dumped with sorted keys
+    """
+    return fastjsonschema.compile(json.loads(schema_json))
 
 
 class JsonSchemaValidator:
@@ -24,19 +35,25 @@ class JsonSchemaValidator:
         if isinstance(schema, Path):
             with schema.open('r') as f:
                 schema = json.load(f)
+        elif hasattr(schema, 'read'):
+            schema = json.load(schema)
         elif isinstance(schema, str):
-            if hasattr(schema, 'read'):
-                schema = json.load(schema)
-            elif schema.endswith(".json") or "/" in schema:
+            # Path string isn't valid JSON, so parsing fails on first characters
+            try:
+                schema = json.loads(schema)
+            except ValueError:
                 with open(schema) as f:
                     schema = json.load(f)
-            else:
-                schema = json.loads(schema)
 
         self.schema = schema
+        # Compiled validator, it isn't a part of deconstruct()
+        self._validate = compile_schema(json.dumps(self.schema, sort_keys=True))
 
     def __call__(self, value: Union[list, dict, str, int, float, bool, type(None)]):
-        validate(value, schema=self.schema)
+        try:
+            self._validate(value)
+        except fastjsonschema.JsonSchemaException as e:
+            raise ValidationError(e.message)
 
     def __eq__(self, other):
         return isinstance(other, JsonSchemaValidator) and self.schema == other.schema
@@ -110,7 +127,7 @@ class BookValidateError:
         )
 
 
-class BookValidator(collections.Iterable):
+class BookValidator(collections.abc.Iterable):
     """
     Iterable object, that contains errors of given pair (book, lang_code)
     """
@@ -118,16 +135,33 @@ class BookValidator(collections.Iterable):
     def __init__(self, book, lang: str):
         self.book = book
         self.lang = lang
+        # structure item type -> handler(item, source, index), handler yields errors of item
+        self._handlers = {
+            "textfragment": self._check_text,
+            "image": self._check_image,
+        }
 
-    def __iter__(self) -> Iterable[BookValidateError]:
-        lang = apps.get_model('books', 'Language').objects.get(code=self.lang)
-        text_fragments: Dict[str, models.Model] = {
-            str(tf.uuid).replace("-", ""): tf
-            for tf in self.book.textfragment_set.filter(type="body", lang=lang)
+    @cached_property
+    def errors(self) -> List[BookValidateError]:
+        """
+        Errors list, book is validated only once per BookValidator instance
+        """
+        return list(self._iter())
+
+    def __iter__(self) -> Iterator[BookValidateError]:
+        return iter(self.errors)
+
+    def _iter(self) -> Iterable[BookValidateError]:
+        fragments = self.book.textfragment_set.filter(type="body", lang__code=self.lang).values_list("uuid", "text")
+        # uuid -> text, checked items are popped
+        self._text_fragments: Dict[str, str] = {
+            uuid.hex: text
+            for uuid, text in fragments
         }
-        images: Dict[int, models.Model] = {
-            img.id: img
-            for img in self.book.content_images.all()
+        # id -> (file, author_id), checked items are popped
+        self._images: Dict[int, Tuple[str, Optional[int]]] = {
+            img_id: (file, author_id)
+            for img_id, file, author_id in self.book.content_images.values_list("id", "file", "author_id")
         }
 
         title = self.book.get_title(self.lang)
@@ -159,98 +193,69 @@ class BookValidator(collections.Iterable):
             )
 
         # Validate structure
-        item: dict
         for i, item in enumerate(self.book.structure):
-            if item["type"] == "textfragment":
-                fragment = text_fragments.pop(item["id"], None)
-                if fragment is None:
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.NotFound,
-                        BookValidateError.ObjType.TextFragment,
-                        index=i, obj_id=item["id"]
-                    )
-                    continue
-
-                if not fragment.text.strip():
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.Empty,
-                        BookValidateError.ObjType.TextFragment,
-                        index=i, obj_id=item["id"]
-                    )
-
-            elif item["type"] == "image":
-                image = images.pop(item["id"], None)
-                if image is None:
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.NotFound,
-                        BookValidateError.ObjType.Image,
-                        index=i, obj_id=item["id"]
-                    )
-
-                if image and not image.file:
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.Empty,
-                        BookValidateError.ObjType.Image,
-                        index=i, obj_id=item["id"]
-                    )
-
-                title = text_fragments.pop(item["title"], None)
-                if title is None:
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.Empty,
-                        BookValidateError.ObjType.ImageTitle,
-                        index=i, obj_id=item["title"]
-                    )
-
-                if image and not image.author:
-                    yield BookValidateError(
-                        BookValidateError.Source.Content,
-                        BookValidateError.Code.Empty,
-                        BookValidateError.ObjType.ImageAuthor,
-                        index=i, obj_id=image.author_id
-                    )
-
-                # Validate structure of image page
-                subitem: dict
-                for j, subitem in enumerate(item["content"]):
-                    if subitem["type"] == "textfragment":
-                        fragment = text_fragments.pop(subitem["id"], None)
-                        if fragment is None:
-                            yield BookValidateError(
-                                BookValidateError.Source.SubContent,
-                                BookValidateError.Code.NotFound,
-                                BookValidateError.ObjType.TextFragment,
-                                index=(i, j), obj_id=subitem["id"]
-                            )
-                            continue
-
-                        if not fragment.text.strip():
-                            yield BookValidateError(
-                                BookValidateError.Source.SubContent,
-                                BookValidateError.Code.Empty,
-                                BookValidateError.ObjType.TextFragment,
-                                index=(i, j), obj_id=subitem["id"]
-                            )
-
-                    elif subitem["type"] == "image":
-                        image = images.pop(subitem["id"], None)
-                        if image is None:
-                            yield BookValidateError(
-                                BookValidateError.Source.SubContent,
-                                BookValidateError.Code.NotFound,
-                                BookValidateError.ObjType.Image,
-                                index=(i, j), obj_id=subitem["id"]
-                            )
-
-                        if image and not image.file:
-                            yield BookValidateError(
-                                BookValidateError.Source.SubContent,
-                                BookValidateError.Code.Empty,
-                                BookValidateError.ObjType.Image,
-                                index=(i, j), obj_id=subitem["id"]
-                            )
+            yield from self._check_item(item, BookValidateError.Source.Content, i)
+
+    def _check_item(self, item: dict, source: BookValidateError.Source, index) -> Iterable[BookValidateError]:
+        handler = self._handlers.get(item["type"])
+        if handler is not None:
+            yield from handler(item, source, index)
+
+    def _check_text(self, item: dict, source: BookValidateError.Source, index) -> Iterable[BookValidateError]:
+        text = self._text_fragments.pop(item["id"], None)
+        if text is None:
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.NotFound,
+                BookValidateError.ObjType.TextFragment,
+                index=index, obj_id=item["id"]
+            )
+        elif not text.strip():
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.Empty,
+                BookValidateError.ObjType.TextFragment,
+                index=index, obj_id=item["id"]
+            )
+
+    def _check_image(self, item: dict, source: BookValidateError.Source, index) -> Iterable[BookValidateError]:
+        image = self._images.pop(item["id"], None)
+        if image is None:
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.NotFound,
+                BookValidateError.ObjType.Image,
+                index=index, obj_id=item["id"]
+            )
+        elif not image[0]:
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.Empty,
+                BookValidateError.ObjType.Image,
+                index=index, obj_id=item["id"]
+            )
+
+        if source is not BookValidateError.Source.Content:
+            return
+
+        # Only top level images have title, author and image page
+        title = self._text_fragments.pop(item["title"], None)
+        if title is None:
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.Empty,
+                BookValidateError.ObjType.ImageTitle,
+                index=index, obj_id=item["title"]
+            )
+
+        if image is not None and image[1] is None:
+            yield BookValidateError(
+                source,
+                BookValidateError.Code.Empty,
+                BookValidateError.ObjType.ImageAuthor,
+                index=index, obj_id=image[1]
+            )
+
+        # Validate structure of image page
+        for j, subitem in enumerate(item["content"]):
+            yield from self._check_item(subitem, BookValidateError.Source.SubContent, (index, j))
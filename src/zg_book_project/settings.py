@@ -152,6 +152,11 @@ if 'BROKER_URL' in os.environ or 'REDIS_CONNECTION' in os.environ:
     CELERY_BROKER_URL = BROKER_URL = os.environ.get('BROKER_URL', os.environ.get("REDIS_CONNECTION") + "1")
     CELERY_RETRY_TIMEOUT = int(os.environ.get('CELERY_RETRY_TIMEOUT', 30))
 
+# Book rendering tasks are long, don't let one worker reserve them while others are idle
+# (workers should be started with -Ofair)
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
 # DRF
 
 REST_FRAMEWORK = {
@@ -14,7 +14,7 @@ cd src
 # set -m
 
 if [[ $1 != "beat" ]]; then
-    su -m root -c "../$VENV/bin/celery worker -f ../log/celery.log -A zg_book_project.celery -n default@%h -E" # &
+    su -m root -c "../$VENV/bin/celery worker -f ../log/celery.log -A zg_book_project.celery -n default@%h -E -Ofair" # &
 else
     rm ../celerybeat.pid
     rm ../celerybeat-schedule